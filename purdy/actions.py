@@ -1,3 +1,4 @@
+# cython: language_level=3
 """
 Actions
 =======
@@ -19,11 +20,13 @@ Each action gets translated into a series of steps defined in the
 """
 import random
 from copy import deepcopy
+from functools import lru_cache
 
 from pygments.token import Generic, Token
 
 from purdy.animation import steps as steplib
-from purdy.parser import CodePart, CodeLine, parse_source, token_is_a
+from purdy.parser import (CodePart, CodeLine, parse_source,
+    parse_source_stream, token_is_a)
 from purdy.scribe import range_set_to_list
 
 # =============================================================================
@@ -38,6 +41,26 @@ def condense(value):
 
     return content
 
+
+@lru_cache(maxsize=128)
+def _parse_cached(source, lexer):
+    # Samples frequently run the same Code object through several actions,
+    # memoize the parse keyed on the source text and the lexer instance.
+    # Returns a tuple so the cached result can't be changed, callers wanting
+    # a list need to convert it themselves
+    return tuple(parse_source(source, lexer))
+
+
+_EMPTY_PART = CodePart(Token, '')
+
+
+@lru_cache(maxsize=128)
+def _dummy_row(lexer):
+    # Blank row inserted at the start of each typewriter line. Listings copy
+    # the lines they are given, so a single instance per lexer can be shared.
+    # Every Code object has its own lexer, keep the cache bounded.
+    return CodeLine([_EMPTY_PART, ], lexer)
+
 # =============================================================================
 # Single Code Blob Actions
 # =============================================================================
@@ -68,7 +91,7 @@ class Insert:
         return f'actions.Insert({self.position}, "{content}")'
 
     def steps(self):
-        lines = parse_source(self.code.source, self.code.lexer)
+        lines = list(_parse_cached(self.code.source, self.code.lexer))
         steps = [steplib.InsertRows(self.code_box, self.position, lines), ]
 
         return steps
@@ -118,7 +141,7 @@ class Replace:
         return f'actions.Replace({self.position}, "{content}")'
 
     def steps(self):
-        lines = parse_source(self.code.source, self.code.lexer)
+        lines = list(_parse_cached(self.code.source, self.code.lexer))
         steps = [steplib.ReplaceRows(self.code_box, self.position, lines), ]
 
         return steps
@@ -217,25 +240,24 @@ class Shell:
 # =============================================================================
 
 class TypewriterBase:
-    continuous = [Generic.Prompt, Generic.Output, Generic.Traceback]
+    continuous = frozenset([Generic.Prompt, Generic.Output, Generic.Traceback])
 
-    @property
-    def delay_until_next_letter(self):
+    def _letter_delays(self, count):
+        # returns a list of "count" delays to wait after each typed letter,
+        # the configured delay plus or minus a random variance
         typing_delay = self.code_box.screen.settings['delay'] / 1000
         variance = self.code_box.screen.settings['delay_variance']
 
-        vary_by = random.randint(0, 2 * variance) - variance
-        return typing_delay + (vary_by / 1000)
+        vary_by = random.choices(range(-variance, variance + 1), k=count)
+        return [typing_delay + (vary / 1000) for vary in vary_by]
 
 
 class TypewriterStep(TypewriterBase):
-    def _line_to_steps(self, line, insert_pos, replace_pos):
+    def _line_to_steps(self, line, insert_pos, replace_pos, is_console):
         steps = []
 
         # --- Skip animation for "output" content
         first_token = line.parts[0].token
-        is_console = self.code.lexer.is_console
-
         if is_console and not token_is_a(first_token, Generic.Prompt):
             # in console mode only lines with prompts get typewriter
             # animation, everything else is just added directly
@@ -244,19 +266,21 @@ class TypewriterStep(TypewriterBase):
         # --- Typewriter animation
         # insert a blank row first with contents of line changing what is on
         # it as animation continues
-        dummy_parts = [CodePart(Token, ''), ]
-        row_line = CodeLine(dummy_parts, self.code.lexer)
+        row_line = _dummy_row(self.code.lexer)
         step = steplib.InsertRows(self.code_box, insert_pos, row_line)
         steps.append(step)
 
         current_parts = []
         num_parts = len(line.parts)
+        delays = self._letter_delays(len(line.text))
+        offset = 0
         for count, part in enumerate(line.parts):
             if part.token in self.continuous:
                 # part is a chunk that gets output all together, replace the
                 # dummy line with the whole contents
                 current_parts.append(part)
-                row_line = CodeLine(deepcopy(current_parts), self.code.lexer)
+                row_line = CodeLine._from_trusted(list(current_parts),
+                    self.code.lexer)
                 step = steplib.ReplaceRows(self.code_box, replace_pos, row_line)
                 steps.append(step)
 
@@ -268,32 +292,24 @@ class TypewriterStep(TypewriterBase):
                 # first token is leading whitespace, don't animate it, just
                 # insert it
                 current_parts.append(part)
-                row_line = CodeLine(deepcopy(current_parts), self.code.lexer)
+                row_line = CodeLine._from_trusted(list(current_parts),
+                    self.code.lexer)
                 step = steplib.ReplaceRows(self.code_box, replace_pos, row_line)
                 steps.append(step)
             else:
-                new_part = CodePart(part.token, '')
-                current_parts.append(new_part)
-
-                typewriter = ''
-                for letter in part.text:
-                    typewriter += letter
-                    new_part = CodePart(part.token, typewriter)
-                    current_parts[-1] = new_part
-                    output_parts = deepcopy(current_parts)
-
-                    # If not last step in animation, add a cursor to the line
+                if part.text:
+                    # type the part out letter by letter, leaving the cursor
+                    # on the line unless this is the last part
+                    part_delays = delays[offset:offset + len(part.text)]
                     is_last_part = (count + 1 == num_parts)
-                    is_last_letter = (len(typewriter) == len(part.text))
-                    if not (is_last_part and is_last_letter):
-                        output_parts.append( CodePart(Token, '\u2588') )
-
-                    row_line = CodeLine(output_parts, self.code.lexer)
-                    step = steplib.ReplaceRows(self.code_box, replace_pos, 
-                        row_line)
+                    step = steplib.TypewriterPart(self.code_box, replace_pos,
+                        self.code.lexer, list(current_parts), part,
+                        part_delays, not is_last_part)
                     steps.append(step)
 
-                    steps.append(steplib.Sleep(self.delay_until_next_letter))
+                current_parts.append(part)
+
+            offset += len(part.text)
 
         return steps
 
@@ -301,15 +317,19 @@ class TypewriterStep(TypewriterBase):
     def steps(self):
         steps = []
 
-        lines = parse_source(self.code.source, self.code.lexer)
+        # steps are generated as each line comes out of the parser rather
+        # than building the full list of lines first
+        lines = parse_source_stream(self.code.source, self.code.lexer)
+        is_console = self.code.lexer.is_console
         for count, line in enumerate(lines):
             if self.position == 0:
                 # Append to end
-                line_steps = self._line_to_steps(line, 0, -1)
+                line_steps = self._line_to_steps(line, 0, -1, is_console)
             else:
                 # Append to position
                 spot = self.position + count
-                line_steps = self._line_to_steps(line, spot, spot)
+                line_steps = self._line_to_steps(line, spot, spot,
+                    is_console)
 
             steps.extend(line_steps)
 
@@ -385,6 +405,7 @@ class SuffixTypewriter(TypewriterBase):
 
     def steps(self):
         steps = []
+        delays = self._letter_delays(len(self.source))
         for count, letter in enumerate(self.source):
             cursor = False
             if count + 1 != len(self.source):
@@ -392,7 +413,7 @@ class SuffixTypewriter(TypewriterBase):
 
             steps.extend([
                 steplib.SuffixRow(self.code_box, self.position, letter, cursor),
-                steplib.Sleep(self.delay_until_next_letter),
+                steplib.Sleep(delays[count]),
             ])
 
         return steps
@@ -127,6 +127,20 @@ class GroupCell(AnimatingCellBase):
                     self.index += 1
                     return
 
+            if isinstance(step, steplib.TypewriterPart):
+                # multi-frame step, sleep between frames; the index isn't
+                # advanced so waking up continues with the same step
+                while step.has_next_frame:
+                    step.render_frame()
+
+                    if not skip:
+                        manager.state = manager.State.SLEEPING
+                        self.animation_alarm_handle = manager.screen.set_alarm(
+                            'animation_alarm', step.delay)
+                        return
+
+                continue
+
             try:
                 step.render_step()
             except steplib.StopMovieException:
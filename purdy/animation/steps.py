@@ -14,6 +14,8 @@ from pygments.token import String, Token
 from purdy.parser import (CodeLine, CodePart, token_is_a, parse_source,
     PurdyLexer)
 
+_CURSOR_PART = CodePart(Token, '\u2588')
+
 # ===========================================================================
 # Animation Steps
 # ===========================================================================
@@ -131,6 +133,81 @@ class ReplaceRows(BaseEditStep):
             self.code_box.listing.replace_line(self.position + count, line)
 
 
+class TypewriterPart:
+    """Types out the text of a single :class:`CodePart` one letter at a time,
+    replacing the row at the given position with each new frame. Frames are
+    built as they are rendered, the containing
+    :class:`purdy.animation.cell.GroupCell` calls :func:`render_frame` and
+    sleeps between them.
+
+    :param code_box: code box the row being typed is in
+    :param position: 1-indexed position of the row, supports negative indexing
+    :param lexer: lexer to assign to the created :class:`CodeLine` objects
+    :param prefix_parts: list of parts already on the row, shown in front of
+                         the part being typed
+    :param part: the :class:`CodePart` to type out
+    :param delays: list of times to sleep after each letter, must be the same
+                   length as the part's text
+    :param final_cursor: True if the cursor remains after the last letter
+    """
+    def __init__(self, code_box, position, lexer, prefix_parts, part, delays,
+            final_cursor):
+        self.code_box = code_box
+        self.position = position
+        self.lexer = lexer
+        self.prefix_parts = prefix_parts
+        self.part = part
+        self.delays = delays
+        self.final_cursor = final_cursor
+
+        self.frame = 0
+
+    def __str__(self):
+        return f'steps.TypewriterPart("{self.part.text}" @ {self.position})'
+
+    @property
+    def has_next_frame(self):
+        return self.frame < len(self.part.text)
+
+    @property
+    def delay(self):
+        # delay after the most recently rendered frame
+        return self.delays[self.frame - 1]
+
+    def _frame_line(self, frame):
+        parts = self.prefix_parts + [
+            CodePart(self.part.token, self.part.text[:frame]), ]
+
+        if self.final_cursor or frame != len(self.part.text):
+            parts.append(_CURSOR_PART)
+
+        return CodeLine._from_trusted(parts, self.lexer)
+
+    def render_frame(self):
+        if self.frame == 0:
+            self.undo_line = self.code_box.listing.copy_lines(self.position)[0]
+
+        self.frame += 1
+        self.code_box.listing.replace_line(self.position,
+            self._frame_line(self.frame))
+
+    def render_step(self):
+        while self.has_next_frame:
+            self.render_frame()
+
+    def undo_step(self):
+        # step back through the rendered frames so the row changes in the
+        # reverse order it was typed
+        for frame in range(self.frame - 1, 0, -1):
+            self.code_box.listing.replace_line(self.position,
+                self._frame_line(frame))
+
+        if self.frame > 0:
+            self.code_box.listing.replace_line(self.position, self.undo_line)
+
+        self.frame = 0
+
+
 class SuffixRow(BaseEditStep):
     def __init__(self, code_box, position, source, cursor=False):
         self.code_box = code_box
@@ -192,12 +269,18 @@ class SuffixRow(BaseEditStep):
                 new_parts = line.parts + source_line.parts
                 replace_line = CodeLine(new_parts, line.lexer)
             else:
-                # last token isn't a string, reparse the whole line
-                text = line.text + self.source
+                # last token isn't a string, reparse the whole line; a cursor
+                # left by a previous suffix is only for display, keep it out
+                parts = line.parts
+                if parts[-1] == _CURSOR_PART:
+                    parts = parts[:-1]
+
+                text = ''.join([part.text for part in parts]) + self.source
                 replace_line = parse_source(text, line.lexer)[0]
 
         if self.cursor:
-            replace_line.parts.append( CodePart(Token, '\u2588') )
+            replace_line = CodeLine._from_trusted(
+                replace_line.parts + [_CURSOR_PART, ], replace_line.lexer)
 
         self.code_box.listing.replace_line(self.position, replace_line)
 
@@ -311,7 +311,14 @@ class Listing:
         else:
             position = self.positive_position(position)
 
-        new_lines = deepcopy(lines)
+        # the same line object may be in the list more than once (e.g. merged
+        # Appends of one blob), share the memo so the lexer is copied once but
+        # forget each line after copying it so every entry gets its own copy
+        new_lines = []
+        memo = {}
+        for line in lines:
+            new_lines.append( deepcopy(line, memo) )
+            memo.pop(id(line), None)
 
         for count, line in enumerate(new_lines):
             if self.starting_line_number > -1:
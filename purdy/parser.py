@@ -1,3 +1,4 @@
+# cython: language_level=3
 """
 Parser
 ======
@@ -7,6 +8,7 @@ This contains methods and classes to manage parsing of code
 
 from copy import deepcopy
 from collections import namedtuple
+from functools import lru_cache
 
 from pygments.lexers import PythonConsoleLexer, PythonLexer, BashSessionLexer
 from pygments.token import String, Token
@@ -58,19 +60,27 @@ class PurdyLexer:
 
 # -----------------------------------------------------------------------------
 
-def token_is_a(token1, token2):
-    """Returns true if token1 is the same type as or a child type of token2"""
-    if token1 == token2:
-        return True
+@lru_cache(maxsize=None)
+def _lineage(token):
+    # Returns a tuple of the token followed by each of its ancestors. Pygments
+    # tokens are process-wide singletons, so this cache stays small
+    lineage = []
+    while(token != None):
+        lineage.append(token)
+        token = token.parent
 
-    parent = token1.parent
-    while(parent != None):
-        if parent == token2:
-            return True
+    return tuple(lineage)
+
+
+@lru_cache(maxsize=None)
+def _ancestors(token):
+    # Set version of _lineage() for fast membership tests
+    return frozenset(_lineage(token))
 
-        parent = parent.parent
 
-    return False
+def token_is_a(token1, token2):
+    """Returns true if token1 is the same type as or a child type of token2"""
+    return token2 in _ancestors(token1)
 
 
 def token_ancestor(token, ancestor_list):
@@ -83,16 +93,10 @@ def token_ancestor(token, ancestor_list):
     :param token: token to translate into an approved ancestor
     :param ancestor_list: list of approved ancestor tokens
     """
-    if token in ancestor_list:
-        return token
-
-    # token not in the approved list, search its ancestors
-    token = token.parent
-    while(token != None):
-        if token in ancestor_list:
-            return token
-
-        token = token.parent
+    # search the token and then its ancestors, closest first
+    for item in _lineage(token):
+        if item in ancestor_list:
+            return item
 
     # something went wrong with our lookup, return the default
     return Token
@@ -124,6 +128,8 @@ class FoldedCodeLine:
 
 
 class CodeLine:
+    __slots__ = ('parts', 'lexer', 'line_number', 'highlight', '_text')
+
     def __init__(self, parts, lexer, line_number=-1, highlight=False):
         """Represents a displayed line of code.
 
@@ -141,7 +147,29 @@ class CodeLine:
         self.line_number = line_number
         self.highlight = highlight
 
-        self.text = ''.join([part.text for part in parts])
+        # text is built on first access, most lines are only ever rendered
+        # from their parts
+        self._text = None
+
+    @classmethod
+    def _from_trusted(cls, parts, lexer, line_number=-1, highlight=False):
+        # Internal alternate constructor for hot paths that build a fresh
+        # parts list and never touch it again, skips the defensive copy
+        line = cls.__new__(cls)
+        line.parts = parts
+        line.lexer = lexer
+        line.line_number = line_number
+        line.highlight = highlight
+        line._text = None
+
+        return line
+
+    @property
+    def text(self):
+        if self._text is None:
+            self._text = ''.join([part.text for part in self.parts])
+
+        return self._text
 
     def __str__(self):
         num = ''
@@ -171,6 +199,15 @@ class CodeLine:
         return colourizer.colourize(self)
 
 
+@lru_cache(maxsize=128)
+def _empty_line(token, lexer):
+    # Blank lines are common, share a single instance for each token and
+    # lexer pair. Listings copy the lines they are given, so shared lines are
+    # never changed. Every Code object has its own lexer, keep the cache
+    # bounded.
+    return CodeLine([CodePart(token, ''), ], lexer)
+
+
 def parse_source(source, lexer):
     """Parses blocks of source text, returning a list of :class:`CodeLine` 
     objects.
@@ -181,12 +218,26 @@ def parse_source(source, lexer):
     return parser.lines
 
 
+def parse_source_stream(source, lexer):
+    """Generator version of :func:`parse_source`, yields each
+    :class:`CodeLine` as soon as it has been parsed.
+    """
+    parser = _Parser(lexer)
+    yield from parser.stream(source)
+
+
 class _Parser:
     def __init__(self, lexer):
         self.lexer = lexer
         self.lines = []
 
     def parse(self, content):
+        self.lines = list(self.stream(content))
+
+    def stream(self, content):
+        # handlers put completed lines in self.lines, yield them after each
+        # token and start a fresh list
+        self.lines = []
         self.parts = []
         for token_type, text in self.lexer.pygments_lexer.get_tokens(content):
             if text.startswith('\n'):
@@ -197,41 +248,48 @@ class _Parser:
             elif text == '':
                 # tokenizer sometimes puts in empty stuff, skip it
                 continue
-            elif token_is_a(token_type, String) and '\n' in text:
+            elif '\n' in text and token_type in String:
                 self.string_handler(token_type, text)
             else:
                 self.default_handler(token_type, text)
 
+            if self.lines:
+                yield from self.lines
+                self.lines = []
+
     def newline_handler(self, token):
         # hit a CR, time to create a new CodeLine object
         if not self.parts:
-            part = CodePart(token, '')
-            self.parts = [part, ]
+            self.lines.append( _empty_line(token, self.lexer) )
+            return
 
-        self.lines.append( CodeLine(self.parts, self.lexer) )
+        self.lines.append( CodeLine._from_trusted(self.parts, self.lexer) )
 
         # reset to start the next set of tokens
         self.parts = []
 
     def string_handler(self, token, text):
-        # String tokens may be multi-line
-        for line in text.splitlines(True):
-            part = CodePart(token, line.rstrip('\n'))
-            self.parts.append(part)
+        # String tokens may be multi-line, every piece except the last one
+        # ends a line
+        pieces = text.split('\n')
+        last = pieces.pop()
+        for piece in pieces:
+            self.parts.append( CodePart(token, piece) )
+            self.lines.append( CodeLine._from_trusted(self.parts, self.lexer) )
+            self.parts = []
 
-            if line[-1] == '\n':
-                self.lines.append( CodeLine(self.parts, self.lexer) )
-                self.parts = []
+        if last:
+            self.parts.append( CodePart(token, last) )
 
     def default_handler(self, token, text):
-        if text[-1] == '\n':
+        if text.endswith('\n'):
             # there is a \n at the end of the text, need to rebuild it
             # without it, then create the CodeLine object
-            part = CodePart(token, text.rstrip('\n'))
+            part = CodePart(token, text[:-1])
             self.parts.append(part)
 
             # text caused a CR, create a new CodeLine object
-            self.lines.append( CodeLine(self.parts, self.lexer ) )
+            self.lines.append( CodeLine._from_trusted(self.parts, self.lexer) )
 
             # reset to start the next group of tokens
             self.parts = []
@@ -4,6 +4,8 @@ Scribe Module (purdy.scribe.py)
 
 Methods for transforming code into different representations on stdout.
 """
+from functools import lru_cache
+
 from colored import fg, bg, attr
 
 from purdy.colour import COLOURIZERS
@@ -14,10 +16,10 @@ RTFColourizer = COLOURIZERS['rtf']
 # Utility Methods
 # =============================================================================
 
-def range_set_to_list(text):
-    ### converts a range set of numbers to a sorted list of unique numbers
-    #
-    # e.g: 3-5,9,8,4 => [3, 4, 5, 8, 9]
+@lru_cache(maxsize=256)
+def _range_set(text):
+    # cached worker for range_set_to_list(), result is a tuple so the shared
+    # copy can't be modified
     values = set()
     parts = text.split(',')
     for part in parts:
@@ -29,7 +31,14 @@ def range_set_to_list(text):
         else:
             values.add(int(part))
 
-    return sorted(values)
+    return tuple(sorted(values))
+
+
+def range_set_to_list(text):
+    ### converts a range set of numbers to a sorted list of unique numbers
+    #
+    # e.g: 3-5,9,8,4 => [3, 4, 5, 8, 9]
+    return list(_range_set(text))
 
 # =============================================================================
 # Scribe to <stdout> Methods
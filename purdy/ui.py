@@ -10,6 +10,8 @@ determines which actual implementation is loaded.
 """
 import argparse, sys
 
+from purdy.actions import Append
+from purdy.animation import steps as steplib
 from purdy.animation.manager import AnimationManager
 from purdy.animation.cell import group_steps_into_cells
 from purdy.cmd import background_arg, max_height_arg
@@ -322,15 +324,27 @@ class Screen:
 
     def load_actions(self, actions):
         steps = []
+        previous = None
         for (index, action) in enumerate(actions):
             try:
-                steps.extend( action.steps() )
+                action_steps = action.steps()
             except:
                 tb = sys.exc_info()[2]
                 raise RuntimeError( ('An exception occurred while loading '
                     f'action #{index+1}: {action.__class__.__name__}'
                     )).with_traceback(tb)
 
+            if isinstance(action, Append) and isinstance(previous, Append) \
+                    and action.code_box is previous.code_box:
+                # back-to-back appends to the same box, merge them into a
+                # single insert so the box only gets updated once
+                lines = steps[-1].lines + action_steps[0].lines
+                steps[-1] = steplib.InsertRows(action.code_box, 0, lines)
+            else:
+                steps.extend(action_steps)
+
+            previous = action
+
         cells = group_steps_into_cells(steps)
         self.animation_manager.register(cells)
 
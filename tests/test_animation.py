@@ -0,0 +1,137 @@
+from unittest import TestCase
+from unittest.mock import Mock, call
+
+from pygments.token import Token
+
+from purdy.animation import steps as steplib
+from purdy.animation.cell import GroupCell
+from purdy.animation.manager import AnimationManager
+from purdy.content import Listing, RenderHook
+from purdy.parser import CodeLine, CodePart
+
+from tests.base import py3_lexer
+
+# =============================================================================
+
+class RecordingHook(RenderHook):
+    def __init__(self):
+        self.changes = []
+
+    def line_changed(self, listing, position, line):
+        self.changes.append(line.text)
+
+
+def typewriter_setup(final_cursor, delays=(0.1, 0.2, 0.3)):
+    # returns a code box with a single blank row and a TypewriterPart that
+    # types "foo" after "def " on that row
+    code_box = Mock()
+    code_box.listing = Listing()
+    code_box.listing.insert_lines(0, [
+        CodeLine([CodePart(Token.Text, '')], py3_lexer)])
+
+    hook = RecordingHook()
+    code_box.listing.set_display(render_hook=hook)
+
+    prefix = [CodePart(Token.Keyword, 'def'), CodePart(Token.Text, ' ')]
+    part = CodePart(Token.Name.Function, 'foo')
+    step = steplib.TypewriterPart(code_box, -1, py3_lexer, prefix, part,
+        delays, final_cursor)
+
+    return code_box, hook, step
+
+
+def mock_manager():
+    manager = Mock()
+    manager.State = AnimationManager.State
+    return manager
+
+
+class TestTypewriterPart(TestCase):
+    def test_frames(self):
+        #--- No cursor after last letter
+        code_box, hook, step = typewriter_setup(False)
+        delays = []
+        while step.has_next_frame:
+            step.render_frame()
+            delays.append(step.delay)
+
+        expected = ['def f█', 'def fo█', 'def foo']
+        self.assertEqual(expected, hook.changes)
+        self.assertEqual([0.1, 0.2, 0.3], delays)
+
+        line = code_box.listing.lines[0]
+        self.assertEqual(Token.Name.Function, line.parts[-1].token)
+        self.assertEqual(3, len(line.parts))
+
+        #--- Cursor kept after last letter
+        code_box, hook, step = typewriter_setup(True)
+        step.render_step()
+
+        expected = ['def f█', 'def fo█', 'def foo█']
+        self.assertEqual(expected, hook.changes)
+        self.assertEqual(Token, code_box.listing.lines[0].parts[-1].token)
+
+    def test_partial_undo(self):
+        code_box, hook, step = typewriter_setup(False)
+        step.render_frame()
+        step.render_frame()
+        step.undo_step()
+
+        # frames are stepped back in reverse, ending with the original row
+        expected = ['def f█', 'def fo█', 'def f█', '']
+        self.assertEqual(expected, hook.changes)
+        self.assertEqual('', code_box.listing.lines[0].text)
+
+        # undo resets the step so it can be typed again from the start
+        hook.changes = []
+        step.render_step()
+        self.assertEqual(['def f█', 'def fo█', 'def foo'],
+            hook.changes)
+
+    def test_cell_alarms(self):
+        code_box, hook, step = typewriter_setup(False)
+        after = steplib.InsertRows(code_box, 0,
+            CodeLine([CodePart(Token.Text, 'after')], py3_lexer))
+
+        cell = GroupCell()
+        cell.steps = [step, after]
+        manager = mock_manager()
+
+        #--- Each frame sleeps, waking up resumes the same step
+        cell.render(manager)
+        self.assertEqual(['def f█'], hook.changes)
+        self.assertEqual(manager.State.SLEEPING, manager.state)
+        self.assertTrue(cell.is_animating)
+
+        cell.animation_wake_up(manager)
+        self.assertEqual(['def f█', 'def fo█'], hook.changes)
+
+        expected = [
+            call('animation_alarm', 0.1),
+            call('animation_alarm', 0.2),
+        ]
+        self.assertEqual(expected, manager.screen.set_alarm.call_args_list)
+        self.assertEqual(1, len(code_box.listing.lines))
+
+        #--- Interrupt finishes the part and the rest of the cell
+        cell.interrupt(manager)
+        self.assertEqual(['def f█', 'def fo█', 'def foo'],
+            hook.changes)
+        self.assertEqual(2, manager.screen.set_alarm.call_count)
+        self.assertEqual(['def foo', 'after'],
+            [line.text for line in code_box.listing.lines])
+
+        #--- Undo the whole cell
+        cell.undo(manager)
+        self.assertEqual([''], [line.text for line in code_box.listing.lines])
+
+    def test_cell_skip(self):
+        code_box, hook, step = typewriter_setup(True)
+        cell = GroupCell()
+        cell.steps = [step, ]
+        manager = mock_manager()
+
+        cell.render(manager, skip=True)
+        self.assertEqual(['def f█', 'def fo█', 'def foo█'],
+            hook.changes)
+        manager.screen.set_alarm.assert_not_called()
@@ -1,9 +1,10 @@
+from pathlib import Path
 from unittest import TestCase
 
 from pygments.token import Token
 
 from purdy.parser import (PurdyLexer, BlankCodeLine, CodeLine, CodePart, 
-    token_is_a, token_ancestor)
+    token_is_a, token_ancestor, parse_source, parse_source_stream)
 
 # =============================================================================
 
@@ -22,6 +23,19 @@ $ echo "hello"
 hello
 """
 
+def sample_sources():
+    # returns (filename, source, lexer) for each file in the display_code
+    # samples, parsed with the lexer detected from its content
+    display_code = Path(__file__).parent.parent / 'extras/display_code'
+    for filename in sorted(display_code.iterdir()):
+        source = filename.read_text()
+        yield filename.name, source, PurdyLexer.factory_from_source(source)
+
+
+def line_contents(lines):
+    return [[(part.token, part.text) for part in line.parts] for line in lines]
+
+
 class TestParser(TestCase):
     def test_lexer_container(self):
         #--- Test the names property
@@ -76,3 +90,10 @@ class TestParser(TestCase):
 
         expected = 'CodeLine(" 10 foo")'
         self.assertEqual(expected, line.__repr__())
+
+    def test_stream(self):
+        for name, source, lexer in sample_sources():
+            expected = line_contents(parse_source(source, lexer))
+            result = line_contents(parse_source_stream(source, lexer))
+            self.assertEqual(expected, result, msg=f'Stream failed: {name}')
+
@@ -0,0 +1,49 @@
+from unittest import TestCase
+
+from purdy.actions import Append, Wait
+from purdy.animation import steps as steplib
+from purdy.content import Code
+from purdy.ui import SimpleScreen
+
+# =============================================================================
+
+def numbered(listing):
+    return [(line.line_number, line.text) for line in listing.lines]
+
+
+class TestScreen(TestCase):
+    def test_merge_appends(self):
+        screen = SimpleScreen(starting_line_number=1)
+        code_box = screen.code_box
+        code = Code(text='a = 1\nb = 2')
+
+        screen.load_actions([
+            Append(code_box, code),
+            Append(code_box, code),
+            Wait(),
+            Append(code_box, code),
+        ])
+
+        # back-to-back appends become a single step, the Wait() stops the
+        # third one from being merged
+        manager = screen.animation_manager
+        self.assertEqual(2, len(manager.cells))
+        self.assertEqual(1, len(manager.cells[0].steps))
+        self.assertIsInstance(manager.cells[0].steps[0], steplib.InsertRows)
+
+        manager.cells[0].render(manager, skip=True)
+        expected = [(1, 'a = 1'), (2, 'b = 2'), (3, 'a = 1'), (4, 'b = 2')]
+        self.assertEqual(expected, numbered(code_box.listing))
+
+        # repeated lines get their own copies, the lexer is copied once
+        lines = code_box.listing.lines
+        self.assertIsNot(lines[0], lines[2])
+        self.assertIs(lines[0].lexer, lines[2].lexer)
+
+        manager.cells[1].render(manager, skip=True)
+        expected.extend([(5, 'a = 1'), (6, 'b = 2')])
+        self.assertEqual(expected, numbered(code_box.listing))
+
+        manager.cells[1].undo(manager)
+        manager.cells[0].undo(manager)
+        self.assertEqual([], code_box.listing.lines)